@@ -6,6 +6,10 @@ from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime
 import calendar
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
 
 # ============================================
 # CONFIGURACIÓN DE PÁGINA
@@ -40,9 +44,47 @@ COLOR_PALETTES = {
         'productos': '#8B5CF6',
         'transacciones': '#10B981',
         'ticket': '#F59E0B'
+    },
+    # Colores para el pronóstico de demanda
+    'forecast': {
+        'historico': '#0EA5E9',
+        'pronostico': '#8B5CF6',
+        'banda': 'rgba(139, 92, 246, 0.18)'
     }
 }
 
+# ============================================
+# CONFIGURACIÓN DEL PRONÓSTICO
+# ============================================
+FORECAST_CONFIG = {
+    'Mensual': {'freq': 'M', 'season_length': 12, 'horizon': 6},
+    'Semanal': {'freq': 'W', 'season_length': 52, 'horizon': 12}
+}
+FORECAST_TOP_N = 10
+FORECAST_METHODS = {
+    'holt_winters': 'Holt-Winters aditivo',
+    'estacional_ingenuo': 'Estacional ingenuo',
+    'promedio': 'Promedio histórico'
+}
+
+# ============================================
+# VISTAS PRECALCULADAS (SNAPSHOTS)
+# ============================================
+# Cada vista parte de los filtros por defecto ('Todas'/'Todos' y todo el
+# rango de fechas); '*' genera una vista por cada valor de la columna.
+SNAPSHOT_VIEWS = [
+    {},
+    {'vendedor': '*'},
+    {'linea': '*'}
+]
+FILTER_COLUMNS = {
+    'linea': 'Linea',
+    'producto': 'Producto',
+    'giro': 'Giro',
+    'cliente': 'Cliente',
+    'vendedor': 'Vendedor'
+}
+
 # CSS personalizado
 st.markdown("""
 <style>
@@ -203,8 +245,7 @@ def create_sample_data():
 # ============================================
 # FUNCIONES DE ANÁLISIS
 # ============================================
-@st.cache_data
-def analyze_data(df, filters):
+def compute_analysis(df, filters):
     """Realiza todos los análisis en una sola pasada"""
     
     mask = pd.Series(True, index=df.index)
@@ -288,6 +329,252 @@ def analyze_data(df, filters):
         'variacion_precios': variacion_precios
     }
 
+@st.cache_data
+def analyze_data(df, filters):
+    """Cálculo en vivo para combinaciones de filtros sin snapshot"""
+    return compute_analysis(df, filters)
+
+def get_data_version(df):
+    """Huella de los datos cargados: cambia cuando cambia el contenido del Excel"""
+    huella = int(pd.util.hash_pandas_object(df, index=False).sum())
+    return f"{len(df)}-{huella:016x}"
+
+# ============================================
+# SNAPSHOTS DE VISTAS FRECUENTES
+# ============================================
+def snapshot_key(filters):
+    """Clave inmutable para un diccionario de filtros"""
+    return tuple(filters[k] for k in sorted(filters))
+
+def expand_snapshot_views(df):
+    """Convierte SNAPSHOT_VIEWS en la lista concreta de filtros a precalcular"""
+    base = {
+        'linea': 'Todas',
+        'producto': 'Todos',
+        'giro': 'Todos',
+        'cliente': 'Todos',
+        'vendedor': 'Todos',
+        'fecha_inicio': df['Fecha'].min().date(),
+        'fecha_fin': df['Fecha'].max().date()
+    }
+    combinaciones = []
+    for view in SNAPSHOT_VIEWS:
+        vistas = [dict(base)]
+        for campo, valor in view.items():
+            valores = sorted(df[FILTER_COLUMNS[campo]].dropna().unique().tolist()) if valor == '*' else [valor]
+            vistas = [{**vista, campo: v} for vista in vistas for v in valores]
+        combinaciones += vistas
+    return combinaciones
+
+@st.cache_resource
+def get_snapshot_store():
+    """Almacén de snapshots compartido por todas las sesiones del proceso"""
+    return {
+        'lock': threading.Lock(),
+        'version': None,
+        'pending': None,
+        'complete': None,
+        'views': {}
+    }
+
+def _fill_snapshots(store, df, data_version, combinaciones):
+    """Calcula y publica cada vista; se detiene si llega una versión más nueva"""
+    for filters in combinaciones:
+        analysis = compute_analysis(df, filters)
+        with store['lock']:
+            if store['version'] != data_version:
+                return False
+            store['views'][snapshot_key(filters)] = analysis
+    return True
+
+def _release_snapshots(store, data_version, completo):
+    """Libera la actualización en curso para que la siguiente ejecución pueda reintentar"""
+    with store['lock']:
+        if completo and store['version'] == data_version:
+            store['complete'] = data_version
+        if store['pending'] == data_version:
+            store['pending'] = None
+
+def _refresh_snapshots(store, df, data_version, combinaciones):
+    """Trabajo en segundo plano: precalcula las vistas restantes de SNAPSHOT_VIEWS"""
+    completo = False
+    try:
+        completo = _fill_snapshots(store, df, data_version, combinaciones)
+    except Exception:
+        logger.exception("Falló la actualización de snapshots (versión %s)", data_version)
+    finally:
+        _release_snapshots(store, data_version, completo)
+
+def ensure_snapshots(df, data_version):
+    """
+    Prepara los snapshots cuando cambia la versión de datos. La vista por
+    defecto se calcula en el momento para servir ya el primer render; el
+    resto se calcula en segundo plano.
+    """
+    store = get_snapshot_store()
+    with store['lock']:
+        if data_version in (store['pending'], store['complete']):
+            return store
+        store['pending'] = data_version
+        if store['version'] != data_version:
+            store['version'] = data_version
+            store['views'] = {}
+        listas = set(store['views'])
+
+    try:
+        combinaciones = [f for f in expand_snapshot_views(df) if snapshot_key(f) not in listas]
+        # En un reintento la vista por defecto ya está publicada
+        sincronas = 0 if listas else 1
+        _fill_snapshots(store, df, data_version, combinaciones[:sincronas])
+    except Exception:
+        logger.exception("Falló el snapshot de la vista por defecto (versión %s)", data_version)
+        _release_snapshots(store, data_version, False)
+        return store
+
+    threading.Thread(
+        target=_refresh_snapshots,
+        args=(store, df, data_version, combinaciones[sincronas:]),
+        name="snapshot-refresh",
+        daemon=True
+    ).start()
+    return store
+
+def get_snapshot(store, data_version, filters):
+    """Devuelve el análisis precalculado, o None si la vista no tiene snapshot"""
+    with store['lock']:
+        if store['version'] != data_version:
+            return None
+        analysis = store['views'].get(snapshot_key(filters))
+    if analysis is None:
+        return None
+    # Copias superficiales: main() agrega columnas a los DataFrames del análisis
+    return {k: v.copy(deep=False) if isinstance(v, pd.DataFrame) else v for k, v in analysis.items()}
+
+# ============================================
+# PRONÓSTICO DE DEMANDA
+# ============================================
+def build_series_matrix(df, column, freq, metric='Cantidad', keys=None):
+    """
+    Agrega la métrica por periodo para cada valor de `column`.
+    Devuelve una matriz (series x periodos) y sus periodos; el primer y
+    el último periodo se descartan si no están completos.
+    """
+    data = df.dropna(subset=[column])
+    if keys is not None:
+        data = data[data[column].isin(keys)]
+    periodo = data['Fecha'].dt.to_period(freq)
+    tabla = data.groupby([data[column], periodo])[metric].sum().unstack(fill_value=0)
+
+    periodos = pd.period_range(df['Fecha'].min().to_period(freq), df['Fecha'].max().to_period(freq), freq=freq)
+    if len(periodos) > 0 and periodos[0].start_time < df['Fecha'].min():
+        periodos = periodos[1:]
+    if len(periodos) > 0 and periodos[-1].end_time.normalize() > df['Fecha'].max():
+        periodos = periodos[:-1]
+    tabla = tabla.reindex(columns=periodos, fill_value=0)
+    if keys is not None:
+        tabla = tabla.reindex(keys, fill_value=0)
+
+    return tabla.to_numpy(dtype=float), tabla.index.tolist(), periodos
+
+def seasonal_naive_batch(Y, season_length, horizon):
+    """Pronóstico estacional ingenuo para todas las series a la vez"""
+    n, T = Y.shape
+    pasos = np.arange(horizon)
+    if T >= season_length:
+        forecast = Y[:, T - season_length + pasos % season_length]
+        errores = Y[:, season_length:] - Y[:, :-season_length]
+        method = 'estacional_ingenuo'
+    else:
+        forecast = np.repeat(Y.mean(axis=1, keepdims=True), horizon, axis=1)
+        errores = Y - Y.mean(axis=1, keepdims=True)
+        method = 'promedio'
+    sigma = np.sqrt((errores ** 2).mean(axis=1)) if errores.shape[1] > 0 else np.zeros(n)
+    return forecast, sigma, method
+
+def holt_winters_batch(Y, season_length, horizon,
+                       alphas=(0.1, 0.3, 0.5), betas=(0.0, 0.05, 0.15), gammas=(0.05, 0.2, 0.4)):
+    """
+    Holt-Winters aditivo ajustado en bloque: todas las series y todas las
+    combinaciones de parámetros avanzan juntas en un solo recorrido del
+    tiempo. Para cada serie se queda la combinación con menor error.
+    """
+    n, T = Y.shape
+    m = season_length
+    if T < 2 * m:
+        return seasonal_naive_batch(Y, m, horizon)
+
+    # Rejilla de parámetros como eje extra: (k, 1) contra series (1, n)
+    grid = np.array(np.meshgrid(alphas, betas, gammas, indexing='ij')).reshape(3, -1)
+    alpha, beta, gamma = (p[:, None] for p in grid)
+    k = grid.shape[1]
+
+    level0 = Y[:, :m].mean(axis=1)
+    level = np.tile(level0, (k, 1))
+    trend = np.tile((Y[:, m:2 * m].mean(axis=1) - level0) / m, (k, 1))
+    season = np.tile(Y[:, :m] - level0[:, None], (k, 1, 1))
+    sse = np.zeros((k, n))
+
+    for t in range(T):
+        y = Y[:, t]
+        s = season[:, :, t % m]
+        error = y - (level + trend + s)
+        if t >= m:
+            sse += error ** 2
+        new_level = alpha * (y - s) + (1 - alpha) * (level + trend)
+        trend = beta * (new_level - level) + (1 - beta) * trend
+        season[:, :, t % m] = gamma * (y - new_level) + (1 - gamma) * s
+        level = new_level
+
+    best = sse.argmin(axis=0)
+    cols = np.arange(n)
+    pasos = np.arange(1, horizon + 1)
+    forecast = (
+        level[best, cols][:, None]
+        + pasos * trend[best, cols][:, None]
+        + season[best, cols][:, (T + pasos - 1) % m]
+    )
+    sigma = np.sqrt(sse[best, cols] / (T - m))
+    return forecast, sigma, 'holt_winters'
+
+@st.cache_data(show_spinner=False)
+def forecast_demand(_df, data_version, frecuencia='Mensual', metric='Cantidad', top_n=FORECAST_TOP_N):
+    """
+    Pronostica la demanda de cada Línea y de los top-N Productos.
+    El resultado se guarda en caché por versión de datos (`_df` no se hashea).
+    Devuelve None si el historial no tiene ningún periodo completo.
+    """
+    config = FORECAST_CONFIG[frecuencia]
+    top_productos = (
+        _df.groupby('Producto')[metric].sum().sort_values(ascending=False).head(top_n).index.tolist()
+    )
+
+    matrices, nombres = [], []
+    for column, keys in (('Linea', None), ('Producto', top_productos)):
+        Y, etiquetas, periodos = build_series_matrix(_df, column, config['freq'], metric, keys)
+        matrices.append(Y)
+        nombres += [(column, etiqueta) for etiqueta in etiquetas]
+    if len(periodos) == 0:
+        return None
+    Y = np.vstack(matrices)
+
+    forecast, sigma, method = holt_winters_batch(Y, config['season_length'], config['horizon'])
+    pasos = np.arange(1, config['horizon'] + 1)
+    margen = 1.96 * sigma[:, None] * np.sqrt(pasos)
+    # La demanda no puede ser negativa: ambos límites salen del pronóstico ya recortado
+    forecast = np.clip(forecast, 0, None)
+
+    fechas = periodos.to_timestamp()
+    fechas_futuras = pd.period_range(periodos[-1] + 1, periods=config['horizon'], freq=config['freq']).to_timestamp()
+    columnas = pd.MultiIndex.from_tuples(nombres, names=['Tipo', 'Serie'])
+
+    return {
+        'historico': pd.DataFrame(Y.T, index=fechas, columns=columnas),
+        'pronostico': pd.DataFrame(forecast.T, index=fechas_futuras, columns=columnas),
+        'inferior': pd.DataFrame(np.clip(forecast - margen, 0, None).T, index=fechas_futuras, columns=columnas),
+        'superior': pd.DataFrame((forecast + margen).T, index=fechas_futuras, columns=columnas),
+        'method': method
+    }
+
 # ============================================
 # FUNCIONES DE VISUALIZACIÓN MEJORADAS
 # ============================================
@@ -324,6 +611,49 @@ def create_line_chart(data):
     fig.update_xaxes(gridcolor='#E2E8F0', gridwidth=1)
     return fig
 
+def create_forecast_chart(historico, pronostico, inferior, superior, y_title="Cantidad (unidades)"):
+    """Serie de tiempo con el pronóstico y su banda de confianza"""
+    colors = COLOR_PALETTES['forecast']
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(superior.index) + list(inferior.index[::-1]),
+        y=list(superior.values) + list(inferior.values[::-1]),
+        fill='toself',
+        fillcolor=colors['banda'],
+        line=dict(color='rgba(0,0,0,0)'),
+        hoverinfo='skip',
+        name='Banda 95%'
+    ))
+    fig.add_trace(go.Scatter(
+        x=historico.index,
+        y=historico.values,
+        mode='lines+markers',
+        line=dict(color=colors['historico'], width=3),
+        marker=dict(size=6, color=colors['historico'], line=dict(width=1, color='white')),
+        name='Histórico'
+    ))
+    fig.add_trace(go.Scatter(
+        x=[historico.index[-1]] + list(pronostico.index),
+        y=[historico.values[-1]] + list(pronostico.values),
+        mode='lines+markers',
+        line=dict(color=colors['pronostico'], width=3, dash='dash'),
+        marker=dict(size=6, color=colors['pronostico']),
+        name='Pronóstico'
+    ))
+    fig.update_layout(
+        hovermode='x unified',
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        font=dict(family="Inter, sans-serif"),
+        height=400,
+        showlegend=True,
+        legend=dict(orientation='h', yanchor='bottom', y=1.02, xanchor='right', x=1),
+        title=None
+    )
+    fig.update_yaxes(gridcolor='#E2E8F0', gridwidth=1, title_text=y_title, rangemode='tozero')
+    fig.update_xaxes(gridcolor='#E2E8F0', gridwidth=1, title_text="Periodo")
+    return fig
+
 def create_bar_chart_vibrant(data, x, y, orientation='v'):
     """
     Gráfico de barras con colores vibrantes y DIFERENTES para cada barra
@@ -466,7 +796,12 @@ def main():
         'fecha_fin': fecha_fin
     }
     
-    analysis = analyze_data(df, filters)
+    # Las vistas frecuentes salen del snapshot; el resto se calcula en vivo
+    data_version = get_data_version(df)
+    store = ensure_snapshots(df, data_version)
+    analysis = get_snapshot(store, data_version, filters)
+    if analysis is None:
+        analysis = analyze_data(df, filters)
     df_filtered = analysis['filtered']
     metrics = analysis['metrics']
     
@@ -538,7 +873,46 @@ def main():
             st.markdown('</div>', unsafe_allow_html=True)
     else:
         st.info("No hay datos para el período seleccionado")
-    
+
+    # ============================================
+    # PRONÓSTICO DE DEMANDA
+    # ============================================
+    st.markdown("---")
+    st.subheader("🔮 Pronóstico de Demanda")
+
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        frecuencia = st.radio("Frecuencia", list(FORECAST_CONFIG.keys()), horizontal=True, key="forecast_freq")
+
+    forecast = forecast_demand(df, data_version, frecuencia)
+    if forecast is None:
+        st.info("No hay suficiente historial para pronosticar con esta frecuencia")
+    else:
+        series = forecast['historico'].columns.tolist()
+
+        # Por defecto se muestra la serie que coincide con los filtros activos
+        default = ('Producto', producto) if ('Producto', producto) in series else ('Linea', linea)
+        with col2:
+            serie = st.selectbox(
+                "Serie",
+                series,
+                index=series.index(default) if default in series else 0,
+                format_func=lambda s: f"{'Línea' if s[0] == 'Linea' else 'Producto'}: {s[1]}",
+                key="forecast_serie"
+            )
+
+        with st.container():
+            st.markdown('<div class="chart-container">', unsafe_allow_html=True)
+            fig_forecast = create_forecast_chart(
+                forecast['historico'][serie],
+                forecast['pronostico'][serie],
+                forecast['inferior'][serie],
+                forecast['superior'][serie]
+            )
+            st.plotly_chart(fig_forecast, use_container_width=True, key="chart_forecast")
+            st.markdown('</div>', unsafe_allow_html=True)
+        st.caption(f"{FORECAST_METHODS[forecast['method']]} sobre el historial completo; banda de confianza del 95%. Top {FORECAST_TOP_N} productos por unidades vendidas.")
+
     # ============================================
     # GRÁFICOS PRIMERA FILA - COLORES VIBRANTES
     # ============================================